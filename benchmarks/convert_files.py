@@ -0,0 +1,67 @@
+"""convert_files.py
+
+Compares the sequential conversion of a station folder with the sharded
+conversion in StationSet.convert_files.
+
+A synthetic folder with hourly measurements is generated in a temporary
+directory for every run.
+
+Usage: python benchmarks/convert_files.py [stations] [days]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from little_r.station_set import StationSet  # noqa: E402
+
+
+def create_folder(folder, stations, days):
+    """Write the metadata and data files of the synthetic stations."""
+    start = datetime(2016, 1, 1)
+
+    for i in range(stations):
+        name = 'station{}'.format(i)
+
+        with open(os.path.join(folder, name + '.json'), 'w') as f:
+            json.dump({'name': name, 'lat': 49.5, 'lon': -114.0, 'height': 1190.0,
+                       'data_file': name + '.csv'}, f)
+
+        with open(os.path.join(folder, name + '.csv'), 'w') as f:
+            f.write('datetime,temperature,wind_speed\n')
+            for hour in range(days * 24):
+                time = start + timedelta(hours=hour)
+                f.write('{},{},{}\n'.format(time.strftime('%Y-%m-%d %H:%M:%S'), 270.0 + hour % 10, 3.5))
+
+
+def measure(name, function):
+    start = time.perf_counter()
+    function()
+    print('{:<40} {:8.1f} ms'.format(name, (time.perf_counter() - start) * 1000))
+
+
+def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 28
+
+    with tempfile.TemporaryDirectory() as folder:
+        create_folder(folder, stations, days)
+        output = os.path.join(folder, 'output')
+        os.mkdir(output)
+
+        station_set = StationSet(folder)
+        station_set.discover_stations()
+
+        measure('generate_reports', station_set.generate_reports)
+        measure('generate_files', lambda: station_set.generate_files(output, 'obs'))
+        measure('generate_files (fsync)', lambda: station_set.generate_files(output, 'obs', fsync=True))
+        measure('convert_files', lambda: station_set.convert_files(output, 'obs'))
+        measure('convert_files (fsync)', lambda: station_set.convert_files(output, 'obs', fsync=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""import_time.py
+
+Measures the cold start of the station_set entry point.
+
+Every sample is a fresh interpreter, so nothing is shared between runs. The
+script reports the time to import the package and the time until the modules
+of the heavy dependencies are loaded by a first conversion.
+
+Usage: python benchmarks/import_time.py [repeats]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+
+SNIPPETS = [
+    ('python startup', 'pass'),
+    ('import little_r.station_set', 'import little_r.station_set'),
+    ('first report', 'import little_r.station_set\n'
+                     'from datetime import datetime\n'
+                     'from little_r import Record\n'
+                     'Record("A", 1, 2, 3, datetime(2017, 1, 1)).little_r_report()'),
+]
+
+HEAVY_MODULES = ['fortranformat', 'arrow']
+
+
+def cold_start(code, repeats):
+    """Run code in `repeats` fresh interpreters and return the wall times."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC + os.pathsep + env.get('PYTHONPATH', '')
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def loaded_heavy_modules():
+    """List the heavy modules that a bare import of the entry point loads."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC + os.pathsep + env.get('PYTHONPATH', '')
+    code = ('import sys, little_r.station_set\n'
+            'print(",".join(m for m in {!r} if m in sys.modules))'.format(HEAVY_MODULES))
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return output.decode().strip() or 'none'
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    for name, code in SNIPPETS:
+        times = cold_start(code, repeats)
+        print('{:<30} median {:7.1f} ms   min {:7.1f} ms'.format(
+            name, statistics.median(times) * 1000, min(times) * 1000))
+
+    print('heavy modules loaded on import: {}'.format(loaded_heavy_modules()))
+
+
+if __name__ == '__main__':
+    main()
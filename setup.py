@@ -32,5 +32,8 @@ setup(
         'click',
         'arrow'
     ],
+    extras_require={
+        'watch': ['inotify_simple']
+    },
     author_email='tommz9@gmail.com'
 )
@@ -1,6 +1,6 @@
 from collections import namedtuple
 from datetime import datetime
-import fortranformat as ff
+from functools import lru_cache
 
 '''
 
@@ -122,9 +122,17 @@ END_FORMAT = '( 3 ( i7 ) )'
 
 UNDEFINED_VALUE = -888888
 
-header_writer = ff.FortranRecordWriter(HEADER_FORMAT)
-data_writer = ff.FortranRecordWriter(DATA_FORMAT)
-end_writer = ff.FortranRecordWriter(END_FORMAT)
+
+@lru_cache(maxsize=None)
+def get_writer(fortran_format):
+    ''' Returns a FortranRecordWriter for the format.
+
+    fortranformat is imported and the writer is built on the first call only,
+    so importing the package stays cheap for short-lived processes.
+    '''
+    import fortranformat as ff
+
+    return ff.FortranRecordWriter(fortran_format)
 
 
 def replace_undefined(data):
@@ -190,7 +198,7 @@ class Record:
         ''' This line has to be at the end of the report after the data closing line
         '''
 
-        return end_writer.write([1, 0, 0])
+        return get_writer(END_FORMAT).write([1, 0, 0])
 
     def data_record(self):
         ''' Generates one line of the data section in the little_r format.
@@ -211,7 +219,7 @@ class Record:
         ]
 
         data = replace_undefined(data)
-        return data_writer.write(data)
+        return get_writer(DATA_FORMAT).write(data)
 
     def data_closing_line(self):
         ''' Generates a line that has to be at the end of the data block
@@ -230,7 +238,7 @@ class Record:
         ]
 
         data = replace_undefined(data)
-        return data_writer.write(data)
+        return get_writer(DATA_FORMAT).write(data)
 
     def message_header(self):
         ''' Generates the header in little_r format
@@ -284,7 +292,7 @@ class Record:
         ]
 
         data = replace_undefined(data)
-        return header_writer.write(data)
+        return get_writer(HEADER_FORMAT).write(data)
 
     def little_r_report(self):
         ''' Generates a report in the little_r format
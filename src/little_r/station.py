@@ -3,12 +3,8 @@
 Author: Tomas Barton, tommz9@gmail.com
 
 """
-import json
-import csv
 import os
 
-import arrow
-
 from .record import Record
 
 
@@ -46,13 +42,7 @@ class Station:
         result = {}
 
         for one_measurement in data_dictionaries:
-            time = one_measurement['datetime']
-
-            if isinstance(time, str):
-                if self.timezone:
-                    time = arrow.get(time).shift(hours=6) # TODO: fix utc conversion
-                else:
-                    time = arrow.get(time)
+            time = self.parse_time(one_measurement['datetime'])
 
             record = Record(self.name, self.lat, self.lon, self.height, time)
 
@@ -76,20 +66,41 @@ class Station:
 
         return result
 
-    def generate_record_from_data_file(self, group_by, data_file_argument=None):
+    def parse_time(self, time):
+        """Convert the time of a measurement to an arrow object.
+
+        Values that are not strings are assumed to be parsed already.
+        """
+        import arrow
+
+        if isinstance(time, str):
+            if self.timezone:
+                time = arrow.get(time).shift(hours=6) # TODO: fix utc conversion
+            else:
+                time = arrow.get(time)
+
+        return time
+
+    def read_data_file(self, data_file_argument=None):
+        """Read the measurements from the csv data file as a list of dictionaries."""
+        import csv
 
         if data_file_argument:
             self.data_file = data_file_argument
-        
+
         with open(self.data_file) as f:
             reader = csv.DictReader(f)
-            dictionaries = list(reader)
+            return list(reader)
 
-        return self.generate_record(dictionaries, group_by)
+    def generate_record_from_data_file(self, group_by, data_file_argument=None):
+
+        return self.generate_record(self.read_data_file(data_file_argument), group_by)
 
     @staticmethod
     def create_from_metadata(filename):
         """Create a station object based on the configuration in json file."""
+        import json
+
         with open(filename, 'r') as f:
             metadata = json.load(f)
         
@@ -1,9 +1,77 @@
 import glob
 import logging
+import os
 import sys
+import tempfile
 
 from .station import Station
 
+
+def hour_bucket(time):
+    """Group measurements by hour, the time part of the obs:YYYY-MM-DD_HH files."""
+    return time.format('YYYY-MM-DD_HH')
+
+
+def default_file_mode():
+    """Mode of a newly created file under the current umask.
+
+    mkstemp creates files readable only by the owner, the obs files get the
+    permissions a plain open() would give them. Reading the umask briefly
+    changes it for the whole process, so call this once before starting
+    workers and pass the mode on.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomically(fn, lines, mode, fsync=False):
+    """Write lines to fn through a temporary file renamed over the target.
+
+    A reader never sees a partially written file. fsync additionally makes
+    the data durable before the rename, which is only needed if the files
+    have to survive a power loss and costs one disk flush per file.
+    """
+
+    directory, name = os.path.split(fn)
+
+    # Hidden and unique, so globs for the obs files and other writers of
+    # the same directory never see it
+    fd, tmp_fn = tempfile.mkstemp(dir=directory, prefix='.' + name)
+
+    try:
+        with os.fdopen(fd, 'w') as output_file:
+            output_file.writelines(lines)
+
+            output_file.flush()
+            os.fchmod(output_file.fileno(), mode)
+            if fsync:
+                os.fsync(output_file.fileno())
+
+        os.replace(tmp_fn, fn)
+    except BaseException:
+        os.unlink(tmp_fn)
+        raise
+
+    return fn
+
+
+def convert_interval(fn, station_rows, mode, fsync):
+    """Convert the measurements of one interval and write them to fn.
+
+    station_rows is a list of (station, measurements) pairs in the order the
+    stations are written. Runs in the worker processes of convert_files.
+    """
+
+    lines = []
+
+    for station, rows in station_rows:
+        for records in station.generate_record(rows, hour_bucket).values():
+            lines.extend(records)
+
+    return write_atomically(fn, lines, mode, fsync)
+
+
 class StationSet:
     def __init__(self, folder):
         self.folder = folder
@@ -15,7 +83,8 @@ class StationSet:
 
     def discover_stations(self):
         
-        json_files = glob.glob(self.folder + '/*.json')
+        # Sorted, so the station order does not depend on the filesystem
+        json_files = sorted(glob.glob(self.folder + '/*.json'))
 
         if not json_files:
             self.logger.info('Cannot find any json files in %s', self.folder)
@@ -37,22 +106,88 @@ class StationSet:
         self.reports = []
 
         for station in self.stations:
-            self.reports.append(station.generate_record_from_data_file(
-                lambda x: x.format('YYYY-MM-DD_HH')))
+            self.reports.append(station.generate_record_from_data_file(hour_bucket))
 
-    def generate_files(self, output_directory, prefix):
-        
-        intervals = self.reports[0].keys()
+    def intervals(self):
+        """Return the sorted union of the hour buckets of all stations."""
+
+        intervals = set()
+
+        for report in self.reports:
+            intervals.update(report.keys())
 
-        for interval in intervals:
-            fn = output_directory + '/obs:' + interval
-            with open(fn, "w") as output_file:
-                for report in self.reports:
-                    try:
-                        output_file.writelines(report[interval])
-                    except KeyError:
-                        pass
+        return sorted(intervals)
 
+    def write_file(self, output_directory, prefix, interval, mode, fsync=False):
+        """Write the reports of all stations for one interval.
+
+        Stations are written in the order of self.stations.
+        """
+
+        fn = os.path.join(output_directory, prefix + ':' + interval)
+
+        return write_atomically(
+            fn, [line for report in self.reports for line in report.get(interval, [])], mode, fsync)
+
+    def generate_files(self, output_directory, prefix, fsync=False):
+        """Write one file per interval from the reports in self.reports.
+
+        Returns the list of written files in interval order.
+        """
+
+        mode = default_file_mode()
+
+        return [self.write_file(output_directory, prefix, interval, mode, fsync)
+                for interval in self.intervals()]
+
+    def shard_measurements(self):
+        """Read the data files and group the measurements by interval.
+
+        Returns a dictionary mapping the interval to a list of
+        (station, measurements) pairs in the order of self.stations. The times
+        are parsed here already, so the shards do not parse them again.
+        """
+
+        shards = {}
+
+        for station in self.stations:
+            by_interval = {}
+
+            for measurement in station.read_data_file():
+                measurement['datetime'] = station.parse_time(measurement['datetime'])
+                by_interval.setdefault(hour_bucket(measurement['datetime']), []).append(measurement)
+
+            for interval, measurements in by_interval.items():
+                shards.setdefault(interval, []).append((station, measurements))
+
+        return shards
+
+    def convert_files(self, output_directory, prefix, workers=None, fsync=False):
+        """Convert the data files of all stations into one file per interval.
+
+        The intervals are sharded across a pool of worker processes, each
+        converting and writing whole files, so the formatting of the records
+        runs in parallel. The files are the same as generate_reports()
+        followed by generate_files() would write.
+
+        workers is the number of processes, None uses one per CPU.
+        Returns the list of written files in interval order.
+        """
+
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        shards = self.shard_measurements()
+        intervals = sorted(shards)
+        filenames = [os.path.join(output_directory, prefix + ':' + interval) for interval in intervals]
+
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(intervals) // (workers * 4))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                convert_interval, filenames, [shards[interval] for interval in intervals],
+                repeat(default_file_mode()), repeat(fsync), chunksize=chunksize))
 
 if __name__ == '__main__':
 
@@ -67,7 +202,5 @@ if __name__ == '__main__':
     station_set = StationSet(folder)
 
     station_set.discover_stations()
-    station_set.generate_reports()
-
-    station_set.generate_files(folder, 'obs')
+    station_set.convert_files(folder, 'obs')
 
@@ -0,0 +1,307 @@
+"""watcher.py
+
+Long running mode around StationSet. The station folder is watched for
+appended CSV rows and the new reports are appended to the obs files as they
+arrive.
+
+Uses inotify (the optional inotify_simple package) when it is available and
+falls back to polling the files otherwise.
+
+"""
+import csv
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from .station_set import StationSet, hour_bucket
+
+
+class CsvTail:
+    """Reads the rows appended to a CSV file since the last handled row.
+
+    Only complete lines are returned, a row that is still being written stays
+    in the file until its newline arrives. read_rows() does not move the
+    offset past the data rows, the caller sets offset once a row is handled.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = 0
+        self.fieldnames = None
+        self.inode = None
+
+        self.logger = logging.getLogger('Csv tail')
+
+    def replaced(self):
+        """True if the file was truncated or replaced since it was read."""
+
+        if self.inode is None:
+            return False
+
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return False
+
+        return stat.st_ino != self.inode or stat.st_size < self.offset
+
+    def read_rows(self):
+        """Return the rows after offset as a list of (end offset, row) pairs.
+
+        row is a dictionary, or None for blank and malformed lines. A last
+        line without a newline is left for a later call.
+        """
+
+        try:
+            with open(self.filename, 'rb') as f:
+                if self.offset == 0:
+                    self.inode = os.fstat(f.fileno()).st_ino
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+
+        rows = []
+        end = self.offset
+
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+
+            end += len(line)
+
+            try:
+                fields = next(csv.reader([line.decode('utf-8')]), [])
+            except UnicodeDecodeError:
+                self.logger.warning('Skipping row that is not utf-8 in %s: %r', self.filename, line)
+                rows.append((end, None))
+                continue
+
+            if self.fieldnames is None:
+                self.fieldnames = fields
+                self.offset = end
+                continue
+
+            if not fields:
+                rows.append((end, None))
+            elif len(fields) != len(self.fieldnames):
+                self.logger.warning('Skipping malformed row in %s: %r', self.filename, line)
+                rows.append((end, None))
+            else:
+                rows.append((end, dict(zip(self.fieldnames, fields))))
+
+        return rows
+
+
+class StationSetWatcher:
+    """Converts new observations of a station folder as they arrive.
+
+    The stations are discovered once in start(). Their metadata, the record
+    writers and the open output files are kept between polls, so a new CSV
+    row only costs its own conversion and one append.
+
+    The first pass rewrites the obs files from everything already in the CSV
+    files. A last line without a newline may still be being written, it is
+    converted only once its newline arrives. Later reports
+    are appended to the end of their obs file, so the stations are no longer
+    grouped in station order inside a file. When a data file is truncated or
+    replaced, the obs files are rebuilt from scratch.
+
+    Rows that cannot be converted are logged and skipped.
+    """
+
+    def __init__(self, folder, output_directory=None, prefix='obs', poll_interval=5.0,
+                 max_open_files=24):
+        self.station_set = StationSet(folder)
+        self.output_directory = output_directory or folder
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self.max_open_files = max_open_files
+
+        self.tails = []
+        self.handles = OrderedDict()
+        self.inotify = None
+
+        self.logger = logging.getLogger('Station set watcher')
+
+    def start(self):
+        """Discover the stations and convert the rows already on disk."""
+
+        self.station_set.discover_stations()
+        self.inotify = self.create_inotify()
+
+        self.rebuild()
+
+    def rebuild(self):
+        """Read all data files from the start and rewrite the obs files."""
+
+        self.close_handles()
+        self.tails = [CsvTail(station.data_file) for station in self.station_set.stations]
+
+        reports = []
+        offsets = []
+
+        for station, tail in zip(self.station_set.stations, self.tails):
+            report = {}
+            rows = tail.read_rows()
+
+            for _, row in rows:
+                for interval, records in self.convert(station, tail, row).items():
+                    report.setdefault(interval, []).extend(records)
+
+            reports.append(report)
+            offsets.append(rows[-1][0] if rows else tail.offset)
+
+        self.station_set.reports = reports
+        self.station_set.generate_files(self.output_directory, self.prefix)
+        self.station_set.reports = []
+
+        for tail, offset in zip(self.tails, offsets):
+            tail.offset = offset
+
+    def convert(self, station, tail, row):
+        """Convert one row to reports grouped by interval, {} if it fails."""
+
+        if row is None:
+            return {}
+
+        try:
+            return station.generate_record([row], hour_bucket)
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning('Skipping row %r in %s: %s', row, tail.filename, e)
+            return {}
+
+    def poll(self):
+        """Append the reports of new rows to the obs files.
+
+        Returns the number of appended reports. If a data file was truncated
+        or replaced, the obs files are rebuilt instead and 0 is returned.
+        """
+
+        if any(tail.replaced() for tail in self.tails):
+            self.logger.warning('A data file was truncated or replaced, rebuilding the obs files')
+            self.rebuild()
+            return 0
+
+        count = 0
+
+        try:
+            for station, tail in zip(self.station_set.stations, self.tails):
+                for offset, row in tail.read_rows():
+                    report = self.convert(station, tail, row)
+
+                    for interval in sorted(report):
+                        self.handle(interval).writelines(report[interval])
+                        count += len(report[interval])
+
+                    tail.offset = offset
+        finally:
+            for handle in self.handles.values():
+                handle.flush()
+
+        if count:
+            self.logger.info('Appended %d reports', count)
+
+        return count
+
+    def handle(self, interval):
+        """Return an open file for the interval, closing the least recently used one."""
+
+        try:
+            self.handles.move_to_end(interval)
+            return self.handles[interval]
+        except KeyError:
+            pass
+
+        if len(self.handles) >= self.max_open_files:
+            _, oldest = self.handles.popitem(last=False)
+            oldest.close()
+
+        fn = os.path.join(self.output_directory, self.prefix + ':' + interval)
+        handle = self.handles[interval] = open(fn, 'a')
+
+        return handle
+
+    def create_inotify(self):
+        """Watch the folder with inotify, None if it is not available."""
+
+        try:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            self.logger.info('inotify_simple is not installed, polling every %s s', self.poll_interval)
+            return None
+
+        inotify = INotify()
+        inotify.add_watch(self.station_set.folder,
+                          flags.MODIFY | flags.CLOSE_WRITE | flags.CREATE | flags.MOVED_TO)
+
+        return inotify
+
+    def wait(self):
+        """Block until a data file may have changed.
+
+        With inotify, events on other files (such as the obs files themselves)
+        are ignored. poll_interval is the upper bound of the wait either way.
+        """
+
+        if self.inotify is None:
+            time.sleep(self.poll_interval)
+            return
+
+        data_files = {os.path.basename(tail.filename) for tail in self.tails}
+        deadline = time.monotonic() + self.poll_interval
+
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+
+            events = self.inotify.read(timeout=int(timeout * 1000))
+            if any(event.name in data_files for event in events):
+                return
+
+    def close_handles(self):
+        """Close the open obs files."""
+
+        for handle in self.handles.values():
+            handle.close()
+        self.handles.clear()
+
+    def close(self):
+        """Close the output files and the inotify watch."""
+
+        self.close_handles()
+
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def run(self):
+        """Convert new observations until interrupted."""
+
+        self.start()
+
+        try:
+            while True:
+                self.wait()
+                self.poll()
+        finally:
+            self.close()
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) != 2:
+        logging.error('Folder missing')
+        sys.exit(1)
+
+    watcher = StationSetWatcher(sys.argv[1])
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 from datetime import datetime
 
@@ -78,5 +80,13 @@ class TestRecord(unittest.TestCase):
         # Just check the lenght
         self.assertEqual(len(r.message_header()), 600)
 
+    def test_import_does_not_load_heavy_dependencies(self):
+
+        code = ('import sys, little_r.station_set; '
+                'print([m for m in ("fortranformat", "arrow") if m in sys.modules])')
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.decode().strip(), '[]')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import stat
+
+from little_r.station_set import StationSet
+
+
+def create_station_set(reports):
+    station_set = StationSet('unused')
+    station_set.reports = reports
+    return station_set
+
+
+def test_intervals_are_union_of_all_stations():
+    station_set = create_station_set([
+        {'2016-01-01_12': ['a\n']},
+        {'2016-01-01_13': ['b\n'], '2016-01-01_12': ['c\n']}
+    ])
+
+    assert station_set.intervals() == ['2016-01-01_12', '2016-01-01_13']
+
+
+def test_generate_files_keeps_station_order(tmpdir):
+    station_set = create_station_set([
+        {'2016-01-01_12': ['a1\n', 'a2\n']},
+        {'2016-01-01_13': ['b1\n'], '2016-01-01_12': ['b2\n']},
+        {'2016-01-01_12': ['c1\n']}
+    ])
+
+    files = station_set.generate_files(str(tmpdir), 'obs')
+
+    assert files == [str(tmpdir.join('obs:2016-01-01_12')), str(tmpdir.join('obs:2016-01-01_13'))]
+    assert tmpdir.join('obs:2016-01-01_12').read() == 'a1\na2\nb2\nc1\n'
+    assert tmpdir.join('obs:2016-01-01_13').read() == 'b1\n'
+    assert sorted(os.listdir(str(tmpdir))) == ['obs:2016-01-01_12', 'obs:2016-01-01_13']
+
+
+def test_generate_files_leaves_no_temporary_files(tmpdir):
+    station_set = create_station_set([{'2016-01-01_12': ['a\n']}])
+
+    station_set.generate_files(str(tmpdir), 'obs')
+
+    assert os.listdir(str(tmpdir)) == ['obs:2016-01-01_12']
+    mode = stat.S_IMODE(os.stat(str(tmpdir.join('obs:2016-01-01_12'))).st_mode)
+    assert mode & stat.S_IRUSR and mode & stat.S_IWUSR
+
+
+def test_discovered_stations_are_written_in_file_name_order(tmpdir):
+    for name in ['c', 'a', 'b']:
+        tmpdir.join(name + '.json').write(json.dumps(
+            {'name': 'Station ' + name, 'lat': 1.0, 'lon': 2.0, 'height': 3.0, 'data_file': name + '.csv'}))
+        tmpdir.join(name + '.csv').write('datetime,temperature\n2016-01-01 12:00:00,270.0\n')
+
+    station_set = StationSet(str(tmpdir))
+    station_set.discover_stations()
+    station_set.generate_reports()
+    station_set.generate_files(str(tmpdir), 'obs')
+
+    assert [station.name for station in station_set.stations] == ['Station a', 'Station b', 'Station c']
+    content = tmpdir.join('obs:2016-01-01_12').read()
+    assert content.index('Station a') < content.index('Station b') < content.index('Station c')
+
+
+def test_convert_files_matches_sequential_conversion(tmpdir):
+    for name in ['c', 'a', 'b']:
+        tmpdir.join(name + '.json').write(json.dumps(
+            {'name': 'Station ' + name, 'lat': 1.0, 'lon': 2.0, 'height': 3.0, 'data_file': name + '.csv'}))
+        tmpdir.join(name + '.csv').write(
+            'datetime,temperature\n2016-01-01 12:00:00,270.0\n2016-01-01 12:30:00,271.0\n')
+    tmpdir.join('b.csv').write('2016-01-01 13:00:00,272.0\n', mode='a')
+
+    sequential = tmpdir.mkdir('sequential')
+    parallel = tmpdir.mkdir('parallel')
+
+    station_set = StationSet(str(tmpdir))
+    station_set.discover_stations()
+    station_set.generate_reports()
+    station_set.generate_files(str(sequential), 'obs')
+
+    files = station_set.convert_files(str(parallel), 'obs', workers=2)
+
+    assert files == [str(parallel.join('obs:2016-01-01_12')), str(parallel.join('obs:2016-01-01_13'))]
+    assert sorted(os.listdir(str(parallel))) == sorted(os.listdir(str(sequential)))
+    for fn in os.listdir(str(sequential)):
+        assert parallel.join(fn).read() == sequential.join(fn).read()
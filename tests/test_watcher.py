@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from little_r.watcher import CsvTail, StationSetWatcher
+
+
+def create_station(tmpdir, data):
+    tmpdir.join('station.json').write(json.dumps(
+        {'name': 'Test station', 'lat': 115.5, 'lon': 67.2, 'height': 850.0, 'data_file': 'station.csv'}))
+    data_file = tmpdir.join('station.csv')
+    data_file.write(data)
+    return data_file
+
+
+def test_tail_returns_only_complete_rows(tmpdir):
+    data_file = tmpdir.join('data.csv')
+    data_file.write('datetime,temperature\n2016-01-01 12:00:00,270.0\n2016-01-01 13:')
+
+    tail = CsvTail(str(data_file))
+
+    rows = tail.read_rows()
+    assert [row for _, row in rows] == [{'datetime': '2016-01-01 12:00:00', 'temperature': '270.0'}]
+
+    tail.offset = rows[-1][0]
+    assert tail.read_rows() == []
+
+    data_file.write('00:00,271.0\n', mode='a')
+
+    assert [row for _, row in tail.read_rows()] == [{'datetime': '2016-01-01 13:00:00', 'temperature': '271.0'}]
+
+
+def test_poll_appends_new_reports(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n2016-01-01 12:00:00,270.0\n')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    first_hour = tmpdir.join('obs:2016-01-01_12')
+    initial = first_hour.read()
+    assert initial.count('Test station') == 1
+
+    data_file.write('2016-01-01 12:30:00,271.0\n2016-01-01 13:00:00,272.0\n', mode='a')
+
+    assert watcher.poll() == 2
+    assert first_hour.read().startswith(initial)
+    assert first_hour.read().count('Test station') == 2
+    assert tmpdir.join('obs:2016-01-01_13').read().count('Test station') == 1
+
+    assert watcher.poll() == 0
+    watcher.close()
+
+
+def test_bad_rows_are_skipped(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n2016-01-01 11:00:00,\n')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    data_file.write('2016-01-01 12:00:00,270.0\n2016-01-01 14:00:00,\n2016-01-01 13:00:00,272.0\n', mode='a')
+
+    assert watcher.poll() == 2
+    assert watcher.tails[0].offset == os.path.getsize(str(data_file))
+    assert not tmpdir.join('obs:2016-01-01_11').exists()
+    assert not tmpdir.join('obs:2016-01-01_14').exists()
+    assert tmpdir.join('obs:2016-01-01_13').read().count('Test station') == 1
+    watcher.close()
+
+
+def test_start_leaves_last_row_without_newline(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n2016-01-01 12:00:00,270.0\n2016-01-01 13:00:00,27')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    assert not tmpdir.join('obs:2016-01-01_13').exists()
+
+    data_file.write('1.0\n', mode='a')
+
+    assert watcher.poll() == 1
+    assert '271.00000' in tmpdir.join('obs:2016-01-01_13').read()
+    watcher.close()
+
+
+def test_rows_that_are_not_utf8_are_skipped(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    data_file.write(b'2016-01-01 12:00:00,27\xb0\n2016-01-01 13:00:00,271.0\n', mode='ab')
+
+    assert watcher.poll() == 1
+    assert not tmpdir.join('obs:2016-01-01_12').exists()
+    assert watcher.tails[0].offset == os.path.getsize(str(data_file))
+    watcher.close()
+
+
+def test_truncated_file_rebuilds_obs_files(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n2016-01-01 12:00:00,270.0\n2016-01-01 13:00:00,271.0\n')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    data_file.write('datetime,temperature\n2016-01-01 12:00:00,270.0\n')
+
+    assert watcher.poll() == 0
+    assert tmpdir.join('obs:2016-01-01_12').read().count('Test station') == 1
+
+    data_file.write('2016-01-01 13:30:00,272.0\n', mode='a')
+
+    assert watcher.poll() == 1
+    assert tmpdir.join('obs:2016-01-01_12').read().count('Test station') == 1
+    watcher.close()
+
+
+def test_replaced_file_rebuilds_obs_files(tmpdir):
+    data_file = create_station(tmpdir, 'datetime,temperature\n2016-01-01 12:00:00,270.0\n')
+
+    watcher = StationSetWatcher(str(tmpdir))
+    watcher.start()
+
+    new_file = tmpdir.join('station.csv.new')
+    new_file.write('datetime,temperature\n2016-01-01 12:00:00,270.0\n2016-01-01 12:30:00,271.0\n')
+    os.replace(str(new_file), str(data_file))
+
+    assert watcher.poll() == 0
+    assert tmpdir.join('obs:2016-01-01_12').read().count('Test station') == 2
+    assert watcher.poll() == 0
+    watcher.close()
+
+
+def test_wait_returns_on_data_file_change(tmpdir):
+    pytest.importorskip('inotify_simple')
+
+    data_file = create_station(tmpdir, 'datetime,temperature\n')
+
+    watcher = StationSetWatcher(str(tmpdir), poll_interval=0.5)
+    watcher.start()
+    assert watcher.inotify is not None
+
+    # Writes to other files in the folder do not wake the watcher
+    start = time.monotonic()
+    tmpdir.join('obs:2016-01-01_12').write('x')
+    watcher.wait()
+    assert time.monotonic() - start >= 0.5
+
+    watcher.poll_interval = 10
+    threading.Timer(0.1, lambda: data_file.write('2016-01-01 12:00:00,270.0\n', mode='a')).start()
+
+    start = time.monotonic()
+    watcher.wait()
+    assert time.monotonic() - start < 5
+
+    assert watcher.poll() == 1
+    watcher.close()